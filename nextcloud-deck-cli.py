@@ -12,27 +12,51 @@ Output modes:
   --markdown   : Markdown-formatted output
 Precedence if multiple flags given: json > markdown > pango > color > default.
 
+--boards ID [ID ...] fetches several boards concurrently; JSON output is
+then a list with one object per board.
+
 Env (or flags):
   NEXTCLOUD_BASE_URL, NEXTCLOUD_USERNAME, NEXTCLOUD_PASSWORD, NEXTCLOUD_BOARD_ID
   NEXTCLOUD_INCLUDE_ARCHIVED=1  # include archived cards
+
+Responses are cached per user and board in an SQLite file (--cache, default
+$XDG_CACHE_HOME/nextcloud-deck-cli.sqlite) and revalidated with the ETag, so an
+unchanged board costs an empty 304. Use --no-cache to always refetch.
 """
 
+from __future__ import annotations
+
 import argparse
+import functools
 import json
 import os
+import sqlite3
 import sys
-import html
-from typing import Any, Dict, List, Optional
+from contextlib import closing
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 from datetime import datetime, timezone
-from dateutil import parser as dateparser  # built-in on most distros
-import requests
 import math
+import operator
+
+if TYPE_CHECKING:
+    import requests  # imported in main() once arguments are valid; keeps --help fast
 
 API_BASE_SUFFIX = "/index.php/apps/deck/api/v1.1"
+# Accept-Encoding is left to requests: it advertises gzip/deflate, plus br
+# when brotli is installed, and only what it can actually decode.
 HEADERS = {
     "OCS-APIRequest": "true",
     "Accept": "application/json",
 }
+PANGO_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"})
+# Pango card line prefix by lowercased stack title
+PANGO_CARD_FORMAT = {
+    "todo": "✔️  {}",
+    "to do": "✔️  {}",
+    "done": "✅ <span foreground='#888888'>{}</span>",
+}
+PANGO_CARD_FORMAT_DEFAULT = "📝 {}"
+_ORDER_KEY = operator.itemgetter("order")
 
 # ---------- Utility ----------
 
@@ -47,9 +71,52 @@ def get_json(r: requests.Response) -> Any:
     r.raise_for_status()
     return r.json()
 
-def fetch_stacks(session: requests.Session, base_url: str, board_id: int) -> List[Dict[str, Any]]:
-    r = session.get(stacks_url(base_url, board_id), timeout=30)
-    data = get_json(r)
+def default_cache_path() -> str:
+    return os.path.join(env("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "nextcloud-deck-cli.sqlite")
+
+def cache_connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))  # board contents are private
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("CREATE TABLE IF NOT EXISTS stacks ("
+                 "user TEXT NOT NULL, url TEXT NOT NULL, etag TEXT NOT NULL, body TEXT NOT NULL, "
+                 "PRIMARY KEY (user, url))")
+    return conn
+
+def cache_lookup(path: str, user: str, url: str) -> Optional[tuple[str, str]]:
+    # Cache failures are never fatal; they just mean a full fetch
+    try:
+        with closing(cache_connect(path)) as conn:
+            return conn.execute("SELECT etag, body FROM stacks WHERE user = ? AND url = ?", (user, url)).fetchone()
+    except (sqlite3.Error, OSError):
+        return None
+
+def cache_store(path: str, user: str, url: str, etag: str, body: str) -> None:
+    try:
+        with closing(cache_connect(path)) as conn, conn:
+            conn.execute("INSERT OR REPLACE INTO stacks (user, url, etag, body) VALUES (?, ?, ?, ?)",
+                         (user, url, etag, body))
+    except (sqlite3.Error, OSError):
+        pass
+
+def fetch_stacks(session: requests.Session, base_url: str, board_id: int,
+                 cache_path: Optional[str] = None) -> List[Dict[str, Any]]:
+    url = stacks_url(base_url, board_id)
+    user = session.auth[0] if session.auth else ""
+    cached = cache_lookup(cache_path, user, url) if cache_path else None
+    r = session.get(url, headers={"If-None-Match": cached[0]} if cached else None, timeout=30)
+    if cached and r.status_code == 304:
+        try:
+            data = json.loads(cached[1])
+        except ValueError:
+            # unreadable cache entry: refetch in full and overwrite it below
+            r = session.get(url, timeout=30)
+            cached = None
+    if not cached or r.status_code != 304:
+        data = get_json(r)
+        etag = r.headers.get("ETag")
+        if cache_path and etag:
+            cache_store(cache_path, user, url, etag, r.text)
     if isinstance(data, dict) and "ocs" in data and "data" in data["ocs"]:
         return data["ocs"]["data"]  # fallback if server wraps response
     return data  # expected: list of stacks; each stack includes "cards"
@@ -59,49 +126,68 @@ def fmt_user(u: Dict[str, Any] | None) -> str:
         return ""
     return u.get("displayname") or u.get("primaryKey") or ""
 
-def build_grouped_model(stacks: List[Dict[str, Any]], include_archived: bool) -> List[Dict[str, Any]]:
+def sort_by_order(items: List[Dict[str, Any]]) -> None:
+    # Deck always sends "order"; fill it in for the rare item without so itemgetter can be used
+    for x in items:
+        x.setdefault("order", 0)
+    items.sort(key=_ORDER_KEY)
+
+def build_grouped_model(stacks: List[Dict[str, Any]], include_archived: bool,
+                        keep_raw_duedate: bool = False) -> List[Dict[str, Any]]:
+    # sorts the fetched lists in place; the raw payload is not reused
     grouped: List[Dict[str, Any]] = []
-    for s in sorted(stacks, key=lambda x: x.get("order", 0)):
-        cards = (s.get("cards") or [])
-        if not include_archived:
-            cards = [c for c in cards if not c.get("archived", False)]
+    sort_by_order(stacks)
+    for s in stacks:
+        cards = s.get("cards") or []
+        sort_by_order(cards)
         grouped.append({
             "stack": {
                 "id": s.get("id"),
                 "title": s.get("title"),
                 "order": s.get("order"),
             },
-            "cards": [
-                {
-                    "id": c.get("id"),
-                    "title": c.get("title"),
-                    "order": c.get("order"),
-                    "archived": c.get("archived", False),
-                    "duedate": parse_duedate(c.get("duedate")),
-                    "owner": fmt_user(c.get("owner")) or None,
-                    "assignees": [fmt_user(u) for u in (c.get("assignedUsers") or []) if fmt_user(u)],
-                    "labels": [lb.get("title","") for lb in (c.get("labels") or []) if lb.get("title")],
-                }
-                for c in sorted(cards, key=lambda x: x.get("order", 0))
-            ]
+            "cards": [reshape_card(c, keep_raw_duedate) for c in cards
+                      if include_archived or not c.get("archived", False)]
         })
     return grouped
 
+def reshape_card(c: Dict[str, Any], keep_raw_duedate: bool = False) -> Dict[str, Any]:
+    # keep_raw_duedate leaves the API's ISO string as is (JSON output needs no datetime)
+    get = c.get
+    return {
+        "id": get("id"),
+        "title": get("title"),
+        "order": get("order"),
+        "archived": get("archived", False),
+        "duedate": (get("duedate") or None) if keep_raw_duedate else parse_duedate(get("duedate")),
+        "owner": fmt_user(get("owner")) or None,
+        "assignees": [n for n in (fmt_user(u) for u in (get("assignedUsers") or [])) if n],
+        "labels": [lb.get("title","") for lb in (get("labels") or []) if lb.get("title")],
+    }
+
 def parse_duedate(raw: Optional[str]) -> Optional[datetime]:
     if not raw:
         return None
+    return _parse_duedate(raw)
+
+@functools.lru_cache(maxsize=4096)
+def _parse_duedate(raw: str) -> Optional[datetime]:
+    # cards on a board often share due dates; datetimes are immutable so sharing is safe
     try:
-        dt = dateparser.parse(raw)
+        try:
+            dt = datetime.fromisoformat(raw)  # Deck emits ISO-8601
+        except ValueError:
+            from dateutil import parser as dateparser  # only needed for odd formats
+            dt = dateparser.parse(raw)
         if not dt.tzinfo:
             dt = dt.replace(tzinfo=timezone.utc)
         return dt
     except Exception:
         return None
 
-def format_duedate(dt: Optional[datetime], style: str = "iso") -> str:
+def format_duedate(dt: Optional[datetime], style: str = "iso", now: Optional[datetime] = None) -> str:
     if not dt:
         return ""
-    now = datetime.now(timezone.utc)
     if style == "iso":
         return dt.isoformat()
     elif style == "local":
@@ -110,27 +196,30 @@ def format_duedate(dt: Optional[datetime], style: str = "iso") -> str:
         except Exception:
             return dt.strftime("%Y-%m-%d %H:%M")
     elif style == "relative":
-        diff = (dt - now).total_seconds()
-        days = diff / 86400
-        if abs(days) < 1:
-            hours = diff / 3600
-            if hours > 0:
-                return f"in {int(hours)} hour(s)"
-            else:
-                return f"{int(abs(hours))}hour(s) ago"
+        if now is None:
+            now = datetime.now(timezone.utc)
+        return format_relative((dt - now).total_seconds())
+    return dt.isoformat()
+
+def format_relative(diff: float) -> str:
+    # diff is seconds from now; positive is in the future
+    days = diff / 86400
+    if -1 < days < 1:
+        hours = diff / 3600
+        if hours > 0:
+            return f"in {int(hours)} hour(s)"
+        return f"{int(-hours)}hour(s) ago"
+    if days > 0:
         if days > 365:
             return f"in {math.ceil(days / 365)} year(s)"
-        elif days > 30:
+        if days > 30:
             return f"in {math.ceil(days / 30)} month(s)"
-        elif days > 0:
-            return f"in {math.ceil(days)} days"
-        elif days < -365:
-            return f"{abs(math.ceil(days / 365))} year(s) ago"
-        elif days < -30:
-            return f"{abs(math.ceil(days / 30))} month(s) ago"
-        else:
-            return f"{abs(math.floor(days))} days ago"
-    return dt.isoformat()
+        return f"in {math.ceil(days)} days"
+    if days < -365:
+        return f"{-math.ceil(days / 365)} year(s) ago"
+    if days < -30:
+        return f"{-math.ceil(days / 30)} month(s) ago"
+    return f"{-math.floor(days)} days ago"
 
 
 
@@ -147,31 +236,43 @@ class Ansi:
     GRAY = "\033[90m"
 
 def colorize_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str) -> str:
+    now = datetime.now(timezone.utc)
     E_STACK, E_CARD, E_LABEL, E_OWNER, E_ASSIGNEES, E_DUE, E_ARCH = "🗂️", "📝", "🏷️", "👤", "👥", "📅", "📦"
+    # per-field prefixes built once per render rather than per card
+    RESET = Ansi.RESET
+    CARD = f"{Ansi.BOLD}{E_CARD} "
+    LABEL = f"{Ansi.MAGENTA}{E_LABEL} "
+    OWNER = f"{Ansi.CYAN}{E_OWNER} "
+    ASSIGNEES = f"{Ansi.CYAN}{E_ASSIGNEES} "
+    DUE = f"{Ansi.YELLOW}{E_DUE} "
+    ARCHIVED = f"{Ansi.DIM}{E_ARCH} archived{RESET}"
     lines: List[str] = []
     for block in grouped:
         st = block["stack"]
-        lines.append(f"\n{Ansi.BOLD}{Ansi.BLUE}{E_STACK} {st.get('title') or f'List {st.get('id')}'}{Ansi.RESET}")
+        if lines:
+            lines.append("")
+        lines.append(f"{Ansi.BOLD}{Ansi.BLUE}{E_STACK} {st.get('title') or f'List {st.get('id')}'}{Ansi.RESET}")
         cards = block["cards"]
         if not cards:
             lines.append(f"{Ansi.DIM}(no cards){Ansi.RESET}")
             continue
         for c in cards:
-            line = f"- {Ansi.BOLD}{E_CARD} {c['title'] or '(untitled)'}{Ansi.RESET}"
+            parts = [f"- {CARD}{c['title'] or '(untitled)'}{RESET}"]
             if c.get("labels"):
-                line += f"  {Ansi.MAGENTA}{E_LABEL} {', '.join(c['labels'])}{Ansi.RESET}"
+                parts.append(f"{LABEL}{', '.join(c['labels'])}{RESET}")
             if show_owner and c.get("owner"):
-                line += f"  {Ansi.CYAN}{E_OWNER} {c['owner']}{Ansi.RESET}"
+                parts.append(f"{OWNER}{c['owner']}{RESET}")
             if c.get("assignees"):
-                line += f"  {Ansi.CYAN}{E_ASSIGNEES} {', '.join(c['assignees'])}{Ansi.RESET}"
+                parts.append(f"{ASSIGNEES}{', '.join(c['assignees'])}{RESET}")
             if c.get("duedate"):
-                line += f"  {Ansi.YELLOW}{E_DUE} {format_duedate(c['duedate'], datefmt)}{Ansi.RESET}"
+                parts.append(f"{DUE}{format_duedate(c['duedate'], datefmt, now)}{RESET}")
             if c.get("archived"):
-                line += f"  {Ansi.DIM}{E_ARCH} archived{Ansi.RESET}"
-            lines.append(line)
-    return "\n".join(lines).lstrip("\n")
+                parts.append(ARCHIVED)
+            lines.append("  ".join(parts))
+    return "\n".join(lines)
 
 def markdown_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str) -> str:
+    now = datetime.now(timezone.utc)
     lines: List[str] = []
     for block in grouped:
         st = block["stack"]
@@ -190,7 +291,7 @@ def markdown_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: st
             if c.get("assignees"):
                 meta.append(f"assignees: {', '.join(c['assignees'])}")
             if c.get("duedate"):
-                meta.append(f"due: {format_duedate(c['duedate'], datefmt)}")
+                meta.append(f"due: {format_duedate(c['duedate'], datefmt, now)}")
             if c.get("archived"):
                 meta.append("archived")
             if meta:
@@ -200,26 +301,25 @@ def markdown_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: st
     return "\n".join(lines).strip()
 
 def pango_escape(text: str) -> str:
-    return html.escape(text, quote=True)
+    # same entities as html.escape(text, quote=True)
+    return text.translate(PANGO_ESCAPE)
 
 def pango_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str) -> str:
+    now = datetime.now(timezone.utc)
     lines: List[str] = []
     for block in grouped:
         st = block["stack"]
+        # only server-supplied text (including the stack id) needs escaping;
+        # the "(untitled)" fallback and formatted due dates are markup-safe
         title = pango_escape(st.get("title") or f"List {st.get('id')}")
         lines.append(f"<b><u>{title}</u></b>")
         cards = block["cards"]
         if not cards:
             lines.append("<span foreground='#6e7781'>(no cards)</span>")
             continue
+        card_format = PANGO_CARD_FORMAT.get((st.get("title") or "").lower(), PANGO_CARD_FORMAT_DEFAULT)
         for c in cards:
-            t = pango_escape(c["title"] or "(untitled)")
-            if st.get("title").lower() == "todo" or st.get("title").lower() == "to do":
-                line = f"✔️  {t}"
-            elif st.get("title").lower() == "done":
-                line = f"✅ <span foreground='#888888'>{t}</span>"
-            else:
-                line = f"📝 {t}"
+            line = card_format.format(pango_escape(c["title"]) if c["title"] else "(untitled)")
             meta = []
             if c.get("labels"):
                 meta.append(f"<span foreground='#a371f7'>🏷️ {pango_escape(', '.join(c['labels']))}</span>")
@@ -228,7 +328,7 @@ def pango_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str)
             if c.get("assignees"):
                 meta.append(f"<span foreground='#58a6ff'>👥 {pango_escape(', '.join(c['assignees']))}</span>")
             if c.get("duedate"):
-                meta.append(f"<span foreground='#d29922'>📅 {pango_escape(format_duedate(c['duedate'], datefmt))}</span>")
+                meta.append(f"<span foreground='#d29922'>📅 {format_duedate(c['duedate'], datefmt, now)}</span>")
             if c.get("archived"):
                 meta.append("<span foreground='#6e7781'>📦 archived</span>")
             if meta:
@@ -238,10 +338,13 @@ def pango_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str)
     return "\n".join(lines)
 
 def plain_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str) -> str:
+    now = datetime.now(timezone.utc)
     lines: List[str] = []
     for block in grouped:
         st = block["stack"]
-        lines.append(f"\n=== {st.get('title') or f'List {st.get('id')}'} ===")
+        if lines:
+            lines.append("")
+        lines.append(f"=== {st.get('title') or f'List {st.get('id')}'} ===")
         cards = block["cards"]
         if not cards:
             lines.append("(no cards)")
@@ -256,13 +359,13 @@ def plain_output(grouped: List[Dict[str, Any]], show_owner: bool, datefmt: str)
             if c.get("assignees"):
                 bits.append(f"assignees: {', '.join(c['assignees'])}")
             if c.get("duedate"):
-                bits.append(f"due: {format_duedate(c['duedate'], datefmt)}")
+                bits.append(f"due: {format_duedate(c['duedate'], datefmt, now)}")
             if c.get("archived"):
                 bits.append("archived")
             if bits:
                 line += "  [" + "; ".join(bits) + "]"
             lines.append(line)
-    return "\n".join(lines).lstrip("\n")
+    return "\n".join(lines)
 
 # ---------- Main ----------
 
@@ -272,6 +375,8 @@ def main():
     parser.add_argument("-u", "--username", default=env("NEXTCLOUD_USERNAME"), help="Username")
     parser.add_argument("-p", "--password", default=env("NEXTCLOUD_PASSWORD"), help="App password")
     parser.add_argument("-b", "--board-id", type=int, default=int(env("NEXTCLOUD_BOARD_ID", "0") or 0), help="Board ID")
+    parser.add_argument("--boards", type=int, nargs="+", metavar="BOARD_ID",
+                        help="Fetch several boards concurrently (overrides -b)")
     parser.add_argument("--include-archived", action="store_true",
                         default=env("NEXTCLOUD_INCLUDE_ARCHIVED") == "1",
                         help="Include archived cards")
@@ -288,55 +393,99 @@ def main():
     parser.add_argument("--date-format",choices=["iso","local","relative"],default="relative",
                         help="How to display due dates (default: relative)")
 
+    # Caching
+    parser.add_argument("--cache", default=default_cache_path(), metavar="PATH",
+                        help="SQLite file caching responses by ETag (default: %(default)s)")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch the full board, bypassing the cache")
+
 
     args = parser.parse_args()
     missing = [name for name, ok in [
         ("base URL", bool(args.url)),
         ("username", bool(args.username)),
         ("app password", bool(args.password)),
-        ("board id", bool(args.board_id)),
+        ("board id", bool(args.boards or args.board_id)),
     ] if not ok]
     if missing:
         print("Missing: " + ", ".join(missing), file=sys.stderr)
         parser.print_help(sys.stderr)
         sys.exit(2)
 
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
     session = requests.Session()
+    # Pooled keep-alive connections; retry connection failures and 502/503/504 up
+    # to 3 times with 0.4s + 0.8s backoff. Read timeouts are not retried and
+    # Retry-After is ignored (maintenance mode sends 120s), so a refused connection
+    # or failing gateway surfaces in ~1.2s plus response time. Worst case is a host
+    # that never accepts the connection: 4 attempts of the 30s timeout (~2 min).
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                          max_retries=Retry(total=3, read=0, backoff_factor=0.2,
+                                            status_forcelist=[502, 503, 504],
+                                            respect_retry_after_header=False))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
     session.auth = (args.username, args.password)
     session.headers.update(HEADERS)
+    session.headers["Connection"] = "keep-alive"
 
-    try:
-        stacks = fetch_stacks(session, args.url, args.board_id)
-    except requests.RequestException as e:
-        print(f"Error fetching stacks for board {args.board_id}: {e}", file=sys.stderr)
-        sys.exit(1)
+    board_ids = args.boards or [args.board_id]
+    cache_path = None if args.no_cache else args.cache
 
-    grouped = build_grouped_model(stacks, include_archived=args.include_archived)
+    if len(board_ids) == 1:
+        try:
+            results = [fetch_stacks(session, args.url, board_ids[0], cache_path)]
+        except requests.RequestException as e:
+            print(f"Error fetching stacks for board {board_ids[0]}: {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        from concurrent.futures import ThreadPoolExecutor, as_completed  # only needed for several boards; pulls in logging
+
+        # Session is shared; the adapter pool above holds up to 8 connections
+        ex = ThreadPoolExecutor(max_workers=min(8, len(board_ids)))
+        futures = {ex.submit(fetch_stacks, session, args.url, bid, cache_path): bid for bid in board_ids}
+        try:
+            for f in as_completed(futures):
+                f.result()  # report the first failure as soon as it happens
+        except requests.RequestException as e:
+            print(f"Error fetching stacks for board {futures[f]}: {e}", file=sys.stderr)
+            ex.shutdown(wait=False, cancel_futures=True)
+            sys.stderr.flush()
+            os._exit(1)  # sys.exit would still join the in-flight workers at interpreter exit
+        ex.shutdown()
+        results = [f.result() for f in futures]  # dict keeps board order
+
+    boards = [
+        (bid, build_grouped_model(stacks, include_archived=args.include_archived, keep_raw_duedate=args.json))
+        for bid, stacks in zip(board_ids, results)
+    ]
 
     # Output precedence: json > markdown > pango > color > plain
     if args.json:
-        # datetime objects need to be ISO stringified
-        def default(o): return o.isoformat() if isinstance(o,datetime) else o
-        print(json.dumps({
-            "board_id": args.board_id,
+        payload = [{
+            "board_id": bid,
             "api_base": args.url.rstrip("/") + API_BASE_SUFFIX,
             "stacks": grouped,
-        }, indent=2, ensure_ascii=False, default=default))
+        } for bid, grouped in boards]
+        print(json.dumps(payload[0] if len(payload) == 1 else payload, indent=2, ensure_ascii=False))
         return
 
+    # header is only printed when several boards are listed
     if args.markdown:
-        print(markdown_output(grouped, args.show_owner, args.date_format))
-        return
-
-    if args.pango:
-        print(pango_output(grouped, args.show_owner, args.date_format))
-        return
-
-    if args.color:
-        print(colorize_output(grouped, args.show_owner, args.date_format))
-        return
-
-    print(plain_output(grouped, args.show_owner, args.date_format))
+        formatter, header = markdown_output, "# Board {}"
+    elif args.pango:
+        formatter, header = pango_output, "<b><big>Board {}</big></b>"
+    elif args.color:
+        formatter, header = colorize_output, f"{Ansi.BOLD}📋 Board {{}}{Ansi.RESET}"
+    else:
+        formatter, header = plain_output, "##### Board {} #####"
+
+    outputs = [formatter(grouped, args.show_owner, args.date_format) for _, grouped in boards]
+    if len(boards) > 1:
+        outputs = [f"{header.format(bid)}\n{out}" for (bid, _), out in zip(boards, outputs)]
+    print("\n\n".join(outputs))
 
 if __name__ == "__main__":
     main()